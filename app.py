@@ -4,9 +4,10 @@ Main Dashboard
 """
 
 import streamlit as st
-from pathlib import Path
 import base64
 
+from utils.cache import get_css_text, get_stats, get_key_manager, get_key_list
+
 # Page config
 st.set_page_config(
     page_title="ImageStegano",
@@ -17,10 +18,9 @@ st.set_page_config(
 
 # Load custom CSS
 def load_css():
-    css_file = Path("styles/main.css")
-    if css_file.exists():
-        with open(css_file) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    css_text = get_css_text()
+    if css_text:
+        st.markdown(f'<style>{css_text}</style>', unsafe_allow_html=True)
 
 load_css()
 
@@ -106,7 +106,7 @@ with tab3:
     3. **Import/Export**: Transfer keys securely between systems
     4. **Delete**: Remove keys you no longer need
     
-    **Fingerprint:** Each key has unique SHA-256 fingerprint
+    **Fingerprint:** Each key has unique BLAKE2b fingerprint
     """)
 
 st.markdown("---")
@@ -143,12 +143,10 @@ st.markdown("---")
 # Statistics
 st.markdown("## 📊 Platform Statistics")
 
-from utils.analytics import Analytics
-from utils.key_manager import KeyManager
-
-stats = Analytics.get_statistics()
-km = KeyManager()
-keys = km.list_keys()
+with st.spinner("Loading statistics..."):
+    stats = get_stats()
+    km = get_key_manager()
+    keys = get_key_list(km)
 
 metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
 
@@ -6,13 +6,15 @@ import streamlit as st
 from pathlib import Path
 import os
 import io
-from PIL import Image
+import hashlib
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from utils.crypto_engine import CryptoEngine, quick_encrypt
 from utils.stego_engine import StegoEngine
-from utils.key_manager import KeyManager
 from utils.analytics import Analytics
+from utils.cache import get_css_text, get_key_manager, get_key_list, cached_validate, key_from_b64
 
 st.set_page_config(
     page_title="Hide Data - SecureStego",
@@ -22,18 +24,12 @@ st.set_page_config(
 
 # Load CSS
 def load_css():
-    css_file = Path("styles/main.css")
-    if css_file.exists():
-        with open(css_file) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    css_text = get_css_text()
+    if css_text:
+        st.markdown(f'<style>{css_text}</style>', unsafe_allow_html=True)
 
 load_css()
 
-# Initialize
-if 'uploads_dir' not in st.session_state:
-    Path("uploads").mkdir(exist_ok=True)
-    Path("output").mkdir(exist_ok=True)
-
 st.markdown("""
 <div class="stego-header">
     <h1>🔐 Hide Encrypted Data</h1>
@@ -55,18 +51,20 @@ with col1:
     )
     
     if uploaded_image:
-        # Save uploaded image
-        image_path = Path("uploads") / uploaded_image.name
-        with open(image_path, "wb") as f:
-            f.write(uploaded_image.getbuffer())
-        
-        # Display image
-        st.image(uploaded_image, caption="Cover Image")
+        # Display image (already-encoded bytes, no re-encode)
+        cover_bytes = uploaded_image.getvalue()
+        st.image(cover_bytes, caption="Cover Image")
         
-        # Validate and show stats
-        is_valid, msg, stats = StegoEngine.validate_image(str(image_path))
+        # Validate and show stats (only when the upload actually changed)
+        cover_digest = hashlib.blake2b(cover_bytes, digest_size=16).hexdigest()
+        if st.session_state.get('cover_digest') != cover_digest:
+            st.session_state['cover_validation'] = cached_validate(cover_bytes)
+            st.session_state['cover_digest'] = cover_digest
+            st.session_state.pop('last_stego_png', None)
+        is_valid, msg, stats = st.session_state['cover_validation']
         
         if is_valid:
+            st.session_state['cover_stats'] = stats
             st.success(msg)
             
             # Show capacity
@@ -88,8 +86,9 @@ with col2:
     st.markdown("### 🔑 Encryption Setup")
     
     # Key selection
-    km = KeyManager()
-    keys = km.list_keys()
+    encryption_key = None
+    km = get_key_manager()
+    keys = get_key_list(km)
     
     if keys:
         key_option = st.radio(
@@ -114,8 +113,7 @@ with col2:
             )
             if key_input:
                 try:
-                    encryption_key = km.string_to_key(key_input)
-                    fingerprint = km.get_key_fingerprint(encryption_key)
+                    encryption_key, fingerprint = key_from_b64(key_input)
                     st.success(f"✅ Valid key | Fingerprint: `{fingerprint}`")
                 except Exception as e:
                     st.error(f"❌ Invalid key: {str(e)}")
@@ -141,145 +139,184 @@ with col2:
 
 st.markdown("---")
 
-# Data Input Section
-st.markdown("### 📝 Secret Data to Hide")
-
-data_type = st.radio(
-    "Data Type",
-    ["Text Message", "Upload File"],
-    horizontal=True
-)
+# Signatures of formats that are already compressed (zip/docx, png, jpg, gzip, pdf)
+COMPRESSED_SIGNATURES = (b'PK\x03\x04', b'\x89PNG', b'\xff\xd8\xff', b'\x1f\x8b', b'%PDF')
 
-if data_type == "Text Message":
-    secret_message = st.text_area(
-        "Enter your secret message",
-        height=150,
-        placeholder="Type your confidential message here...",
-        help="This will be encrypted before embedding"
-    )
+# Data Input + Hide Section
+# Runs as a fragment: typing a message or clicking the button reruns only
+# this block, not the upload preview and key selection above.
+@st.fragment
+def data_entry_fragment(encryption_key, uploaded_image):
+    st.markdown("### 📝 Secret Data to Hide")
     
-    if secret_message:
-        data_bytes = secret_message.encode('utf-8')
-        st.info(f"📏 Message size: **{len(data_bytes)} bytes** ({len(data_bytes)/1024:.2f} KB)")
+    data_bytes = None
 
-else:  # Upload File
-    secret_file = st.file_uploader(
-        "Upload file to hide",
-        type=['txt', 'pdf', 'docx', 'jpg', 'png', 'zip', 'json'],
-        help="Any file type supported"
+    data_type = st.radio(
+        "Data Type",
+        ["Text Message", "Upload File"],
+        horizontal=True
     )
-    
-    if secret_file:
-        data_bytes = secret_file.read()
-        st.info(f"📄 File: **{secret_file.name}** | Size: **{len(data_bytes)} bytes** ({len(data_bytes)/1024:.2f} KB)")
 
-st.markdown("---")
+    if data_type == "Text Message":
+        secret_message = st.text_area(
+            "Enter your secret message",
+            height=150,
+            placeholder="Type your confidential message here...",
+            help="This will be encrypted before embedding"
+        )
+        
+        if secret_message:
+            data_bytes = secret_message.encode('utf-8')
+            st.info(f"📏 Message size: **{len(data_bytes)} bytes** ({len(data_bytes)/1024:.2f} KB)")
 
-# Hide Button
-st.markdown("### 🚀 Hide Data")
+    else:  # Upload File
+        secret_file = st.file_uploader(
+            "Upload file to hide",
+            type=['txt', 'pdf', 'docx', 'jpg', 'png', 'zip', 'json'],
+            help="Any file type supported"
+        )
+        
+        if secret_file:
+            # Zero-copy view of the upload; AES-GCM reads it directly
+            data_bytes = memoryview(secret_file.getbuffer())
+            st.info(f"📄 File: **{secret_file.name}** | Size: **{len(data_bytes)} bytes** ({len(data_bytes)/1024:.2f} KB)")
 
-col_btn1, col_btn2, col_btn3 = st.columns([1, 1, 1])
+    st.markdown("---")
 
-with col_btn2:
-    hide_button = st.button(
-        "🔐 Encrypt & Hide",
-        use_container_width=True,
-        type="primary"
-    )
+    # Hide Button
+    st.markdown("### 🚀 Hide Data")
 
-if hide_button:
-    # Validation
-    if not uploaded_image:
-        st.error("❌ Please upload a cover image")
-        st.stop()
-    
-    if 'encryption_key' not in locals():
-        st.error("❌ Please select or generate an encryption key")
-        st.stop()
-    
-    if 'data_bytes' not in locals():
-        st.error("❌ Please enter data to hide")
-        st.stop()
-    
-    # Check capacity
-    is_valid, msg, stats = StegoEngine.validate_image(str(image_path))
-    estimated_encrypted_size = len(data_bytes) * 2  # Rough estimate with encryption overhead
-    
-    if estimated_encrypted_size > stats['capacity_bytes']:
-        st.error(f"❌ Data too large for image\n\nData: ~{estimated_encrypted_size} bytes\nCapacity: {stats['capacity_bytes']} bytes")
-        st.stop()
-    
-    # Progress
-    progress_bar = st.progress(0, text="Starting encryption...")
-    
-    try:
-        # Step 1: Encrypt
-        progress_bar.progress(25, text="🔒 Encrypting data with AES-256-GCM...")
-        
-        metadata = {
-            'filename': uploaded_image.name if data_type == "Upload File" else "message.txt",
-            'type': data_type
-        }
-        
-        encrypted_bundle = quick_encrypt(encryption_key, data_bytes, metadata)
-        
-        progress_bar.progress(50, text="📦 Encrypted! Now embedding in image...")
-        
-        # Step 2: Embed
-        output_filename = f"stego_{Path(uploaded_image.name).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        output_path = Path("output") / output_filename
-        
-        hide_stats = StegoEngine.hide(
-            str(image_path),
-            encrypted_bundle,
-            str(output_path)
+    col_btn1, col_btn2, col_btn3 = st.columns([1, 1, 1])
+
+    with col_btn2:
+        hide_button = st.button(
+            "🔐 Encrypt & Hide",
+            use_container_width=True,
+            type="primary"
         )
+
+    if hide_button:
+        # Validation
+        if not uploaded_image:
+            st.error("❌ Please upload a cover image")
+            st.stop()
         
-        progress_bar.progress(75, text="✅ Embedded! Finalizing...")
-        
-        # Step 3: Log analytics
-        Analytics.log_operation('hide', {
-            'cover_image': uploaded_image.name,
-            'payload_bytes': len(data_bytes),
-            'payload_kb': len(data_bytes) / 1024,
-            'capacity_used': hide_stats['capacity_used_percent'],
-            'output_file': output_filename
-        })
+        if encryption_key is None:
+            st.error("❌ Please select or generate an encryption key")
+            st.stop()
         
-        progress_bar.progress(100, text="✅ Complete!")
+        if data_bytes is None:
+            st.error("❌ Please enter data to hide")
+            st.stop()
         
-        # Success!
-        st.balloons()
-        st.success("🎉 **Successfully hidden encrypted data in image!**")
+        # Compress before encrypting: fewer bytes to embed
+        payload = data_bytes
+        compressed = False
+        if not bytes(data_bytes[:4]).startswith(COMPRESSED_SIGNATURES):
+            deflated = zlib.compress(data_bytes, 6)
+            if len(deflated) < len(data_bytes):
+                payload, compressed = deflated, True
         
-        # Show results
-        st.markdown("#### 📊 Operation Summary")
+        metadata = {
+            'filename': uploaded_image.name if data_type == "Upload File" else "message.txt",
+            'type': data_type,
+            'compressed': compressed
+        }
         
-        summary_col1, summary_col2, summary_col3 = st.columns(3)
+        # Check capacity (stats captured when the cover was validated)
+        stats = st.session_state['cover_stats']
+        estimated_encrypted_size = CryptoEngine.estimate_bundle_size(len(payload), metadata)
         
-        with summary_col1:
-            st.metric("Original Data", f"{len(data_bytes)} bytes")
+        if estimated_encrypted_size > stats['capacity_bytes']:
+            st.error(f"❌ Data too large for image\n\nData: ~{estimated_encrypted_size} bytes\nCapacity: {stats['capacity_bytes']} bytes")
+            st.stop()
         
-        with summary_col2:
-            st.metric("Encrypted Payload", f"{len(encrypted_bundle)} bytes")
+        # Progress
+        progress_bar = st.progress(0, text="Starting encryption...")
         
-        with summary_col3:
-            st.metric("Capacity Used", f"{hide_stats['capacity_used_percent']:.1f}%")
+        try:
+            cover_bytes = uploaded_image.getvalue()
+            
+            # Decode the cover in the background while encrypting
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                cover_future = executor.submit(StegoEngine.load_cover, cover_bytes)
+                
+                # Step 1: Encrypt
+                progress_bar.progress(25, text="🔒 Encrypting data with AES-256-GCM...")
+                
+                encrypted_bundle = quick_encrypt(encryption_key, payload, metadata)
+                
+                progress_bar.progress(50, text="📦 Encrypted! Now embedding in image...")
+                
+                cover_image = cover_future.result()
+            
+            # Step 2: Embed
+            output_filename = f"stego_{Path(uploaded_image.name).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+            
+            stego_png_bytes, hide_stats = StegoEngine.hide_bytes(
+                cover_bytes,
+                encrypted_bundle,
+                cover_image=cover_image
+            )
+            
+            progress_bar.progress(75, text="✅ Embedded! Finalizing...")
+            
+            # Keep the result in memory for preview/download reruns
+            st.session_state['last_stego_png'] = stego_png_bytes
+            st.session_state['last_stego_name'] = output_filename
+            
+            # Step 3: Log analytics (a logging failure must not lose the result)
+            try:
+                Analytics.log_operation('hide', {
+                    'cover_image': uploaded_image.name,
+                    'payload_bytes': len(data_bytes),
+                    'payload_kb': len(data_bytes) / 1024,
+                    'capacity_used': hide_stats['capacity_used_percent'],
+                    'output_file': output_filename
+                })
+            except Exception as e:
+                st.warning(f"⚠️ Could not record analytics: {str(e)}")
+            
+            progress_bar.progress(100, text="✅ Complete!")
+            
+            # Success!
+            st.balloons()
+            st.success("🎉 **Successfully hidden encrypted data in image!**")
+            
+            # Show results
+            st.markdown("#### 📊 Operation Summary")
+            
+            summary_col1, summary_col2, summary_col3 = st.columns(3)
+            
+            with summary_col1:
+                st.metric("Original Data", f"{len(data_bytes)} bytes")
+            
+            with summary_col2:
+                st.metric("Encrypted Payload", f"{len(encrypted_bundle)} bytes")
+            
+            with summary_col3:
+                st.metric("Capacity Used", f"{hide_stats['capacity_used_percent']:.1f}%")
+            
+        except Exception as e:
+            st.error(f"❌ Error during operation: {str(e)}")
+            progress_bar.empty()
+    
+    # Last stego image, served from memory (survives the download rerun)
+    if 'last_stego_png' in st.session_state:
+        stego_png_bytes = st.session_state['last_stego_png']
         
         # Display stego image
         st.markdown("#### 🖼️ Stego Image")
-        stego_img = Image.open(output_path)
-        st.image(stego_img, caption="Stego Image (with hidden data)")
+        st.image(stego_png_bytes, caption="Stego Image (with hidden data)")
         
         # Download button
-        with open(output_path, "rb") as file:
-            st.download_button(
-                label="📥 Download Stego Image",
-                data=file,
-                file_name=output_filename,
-                mime="image/png",
-                use_container_width=True
-            )
+        st.download_button(
+            label="📥 Download Stego Image",
+            data=stego_png_bytes,
+            file_name=st.session_state['last_stego_name'],
+            mime="image/png",
+            use_container_width=True
+        )
         
         # Security tips
         st.markdown("---")
@@ -293,25 +330,25 @@ if hide_button:
         
         ⚠️ **Don't modify:** Editing the image may corrupt hidden data.
         """)
-        
-    except Exception as e:
-        st.error(f"❌ Error during operation: {str(e)}")
-        progress_bar.empty()
+
+
+data_entry_fragment(encryption_key, uploaded_image)
 
 # Sidebar info
 with st.sidebar:
     st.markdown("### 💡 How It Works")
     st.markdown("""
     **Encryption Layer:**
-    1. Generate random 96-bit nonce
-    2. Encrypt data with AES-256-GCM
-    3. Generate 128-bit auth tag
-    4. Bundle nonce + ciphertext + tag
+    1. Compress data with zlib (skipped for zip/png/jpg)
+    2. Generate random 96-bit nonce
+    3. Encrypt data with AES-256-GCM
+    4. Generate 128-bit auth tag
+    5. Bundle nonce + ciphertext + tag
     
     **Steganography Layer:**
-    5. Encode bundle as base64
-    6. Embed in image LSBs
-    7. Save as lossless PNG
+    6. Prefix bundle with 32-bit length
+    7. Embed raw bytes in image LSBs
+    8. Save as lossless PNG
     
     **Security:** Even if steganography is detected, encrypted data remains confidential.
     """)
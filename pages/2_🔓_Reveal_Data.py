@@ -3,14 +3,15 @@ Reveal Data Page - Extract and Decrypt Hidden Data
 """
 
 import streamlit as st
-from pathlib import Path
 import io
+import hashlib
+import zlib
 from datetime import datetime
 
 from utils.crypto_engine import CryptoEngine, quick_decrypt
 from utils.stego_engine import StegoEngine
-from utils.key_manager import KeyManager
 from utils.analytics import Analytics
+from utils.cache import get_css_text, get_key_manager, get_key_list, cached_open_metadata, key_from_b64
 
 st.set_page_config(
     page_title="Reveal Data - SecureStego",
@@ -20,16 +21,12 @@ st.set_page_config(
 
 # Load CSS
 def load_css():
-    css_file = Path("styles/main.css")
-    if css_file.exists():
-        with open(css_file) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    css_text = get_css_text()
+    if css_text:
+        st.markdown(f'<style>{css_text}</style>', unsafe_allow_html=True)
 
 load_css()
 
-# Initialize
-Path("uploads").mkdir(exist_ok=True)
-
 st.markdown("""
 <div class="stego-header">
     <h1>🔓 Reveal Hidden Data</h1>
@@ -51,18 +48,16 @@ with col1:
     )
     
     if stego_image:
-        # Save uploaded image
-        stego_path = Path("uploads") / stego_image.name
-        with open(stego_path, "wb") as f:
-            f.write(stego_image.getbuffer())
-        
-        # Display image
-        st.image(stego_image, caption="Stego Image")
+        # Display image (already-encoded bytes, no re-encode)
+        stego_bytes = stego_image.getvalue()
+        st.image(stego_bytes, caption="Stego Image")
         
-        # Image info
-        from PIL import Image
-        img = Image.open(stego_path)
-        width, height = img.size
+        # Image info (only re-read when the upload actually changed)
+        stego_digest = hashlib.blake2b(stego_bytes, digest_size=16).hexdigest()
+        if st.session_state.get('stego_digest') != stego_digest:
+            st.session_state['stego_info'] = cached_open_metadata(stego_bytes)
+            st.session_state['stego_digest'] = stego_digest
+        width, height, img_format = st.session_state['stego_info']
         
         info_col1, info_col2, info_col3 = st.columns(3)
         with info_col1:
@@ -70,14 +65,14 @@ with col1:
         with info_col2:
             st.metric("Height", f"{height}px")
         with info_col3:
-            st.metric("Format", img.format)
+            st.metric("Format", img_format)
 
 with col2:
     st.markdown("### 🔑 Decryption Key")
     
     # Key selection
-    km = KeyManager()
-    keys = km.list_keys()
+    km = get_key_manager()
+    keys = get_key_list(km)
     
     if keys:
         key_option = st.radio(
@@ -92,7 +87,9 @@ with col2:
             
             if selected_key_name:
                 decryption_key, key_meta = km.load_key(selected_key_name)
-                st.info(f"🔑 Selected: **{selected_key_name}**\n\nFingerprint: `{key_meta['fingerprint']}`")
+                # Stored value: keys saved before B2- fingerprints keep their SHA-256 one
+                fingerprint = key_meta['fingerprint']
+                st.info(f"🔑 Selected: **{selected_key_name}**\n\nFingerprint: `{fingerprint}`")
         
         else:  # Manual entry
             key_input = st.text_input(
@@ -102,8 +99,7 @@ with col2:
             )
             if key_input:
                 try:
-                    decryption_key = km.string_to_key(key_input)
-                    fingerprint = km.get_key_fingerprint(decryption_key)
+                    decryption_key, fingerprint = key_from_b64(key_input)
                     st.success(f"✅ Valid key | Fingerprint: `{fingerprint}`")
                 except Exception as e:
                     st.error(f"❌ Invalid key format: {str(e)}")
@@ -117,7 +113,7 @@ with col2:
         )
         if key_input:
             try:
-                decryption_key = km.string_to_key(key_input)
+                decryption_key, fingerprint = key_from_b64(key_input)
                 st.success("✅ Key accepted")
             except Exception as e:
                 st.error(f"❌ Invalid key: {str(e)}")
@@ -154,21 +150,26 @@ if reveal_button:
         # Step 1: Extract
         progress_bar.progress(25, text="📤 Extracting hidden data from image...")
         
-        encrypted_bundle = StegoEngine.reveal(str(stego_path))
+        encrypted_bundle = StegoEngine.reveal_bytes(stego_image.getvalue())
         
         progress_bar.progress(50, text="🔓 Decrypting with AES-256-GCM...")
         
         # Step 2: Decrypt
         decrypted_data, metadata = quick_decrypt(decryption_key, encrypted_bundle)
+        if metadata.get('compressed'):
+            decrypted_data = zlib.decompress(decrypted_data)
         
         progress_bar.progress(75, text="✅ Decrypted! Verifying integrity...")
         
-        # Step 3: Log analytics
-        Analytics.log_operation('reveal', {
-            'stego_image': stego_image.name,
-            'data_size_bytes': len(decrypted_data),
-            'data_size_kb': len(decrypted_data) / 1024
-        })
+        # Step 3: Log analytics (a logging failure must not lose the result)
+        try:
+            Analytics.log_operation('reveal', {
+                'stego_image': stego_image.name,
+                'data_size_bytes': len(decrypted_data),
+                'data_size_kb': len(decrypted_data) / 1024
+            })
+        except Exception as e:
+            st.warning(f"⚠️ Could not record analytics: {str(e)}")
         
         progress_bar.progress(100, text="✅ Complete!")
         
@@ -190,8 +191,8 @@ if reveal_button:
             st.metric("Encrypted", encrypted_at)
         
         with meta_col3:
-            original_size = metadata.get('size', len(decrypted_data))
-            st.metric("Original Size", f"{original_size} bytes")
+            stored_size = metadata.get('size', len(decrypted_data))
+            st.metric("Compressed Size" if metadata.get('compressed') else "Original Size", f"{stored_size} bytes")
         
         st.markdown("---")
         
@@ -249,11 +250,11 @@ if reveal_button:
             """)
         
         with verify_col2:
-            key_hash = metadata.get('key_hash', 'Unknown')
+            # Same fingerprint the key picker showed, not the bundle's AAD key hash
             st.info(f"""
             **🔑 Key Verification**
             
-            Key fingerprint: `{key_hash}`
+            Key fingerprint: `{fingerprint}`
             """)
         
     except ValueError as e:
@@ -284,15 +285,15 @@ with st.sidebar:
     st.markdown("### 💡 How It Works")
     st.markdown("""
     **Extraction Process:**
-    1. Read LSBs from pixels
+    1. Read 32-bit length from LSBs
     2. Reconstruct byte stream
-    3. Decode base64 bundle
+    3. Parse encrypted bundle
     
     **Decryption Process:**
     4. Parse nonce + ciphertext + tag
     5. Verify authentication tag
     6. Decrypt with AES-256-GCM
-    7. Return original data
+    7. Decompress (if compressed) and return original data
     
     **Security:** Tag verification ensures data wasn't tampered with.
     """)
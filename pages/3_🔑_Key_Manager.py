@@ -7,7 +7,8 @@ from pathlib import Path
 from datetime import datetime
 import io
 
-from utils.key_manager import KeyManager
+from utils.crypto_engine import clear_key_cache
+from utils.cache import get_css_text, get_key_manager, get_key_list, key_from_b64
 
 st.set_page_config(
     page_title="Key Manager - SecureStego",
@@ -17,10 +18,9 @@ st.set_page_config(
 
 # Load CSS
 def load_css():
-    css_file = Path("styles/main.css")
-    if css_file.exists():
-        with open(css_file) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    css_text = get_css_text()
+    if css_text:
+        st.markdown(f'<style>{css_text}</style>', unsafe_allow_html=True)
 
 load_css()
 
@@ -32,16 +32,16 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize
-km = KeyManager()
+km = get_key_manager()
 
-# Tabs
-tab1, tab2, tab3, tab4 = st.tabs(["📋 All Keys", "➕ Generate New", "📥 Import", "📤 Export"])
-
-# Tab 1: All Keys
-with tab1:
+# Tab bodies run as fragments: view/export clicks and selections rerun only
+# their own tab. Actions that change the key set trigger a full rerun so the
+# other tabs and the sidebar pick up the change.
+@st.fragment
+def all_keys_fragment(km):
     st.markdown("### 🔑 Your Encryption Keys")
     
-    keys = km.list_keys()
+    keys = get_key_list(km)
     
     if not keys:
         st.info("📭 No keys found. Generate your first key in the 'Generate New' tab.")
@@ -72,11 +72,7 @@ with tab1:
                     
                     if st.button("📤 Export", key=f"export_{i}"):
                         try:
-                            export_path = Path("keys") / f"export_{key['name']}.json"
-                            km.export_key(key['name'], str(export_path))
-                            
-                            with open(export_path, 'r') as f:
-                                export_data = f.read()
+                            export_data = km.export_key_json(key['name'])
                             
                             st.download_button(
                                 label="Download Key File",
@@ -85,15 +81,15 @@ with tab1:
                                 mime="application/json",
                                 key=f"download_{i}"
                             )
-                            
-                            # Clean up
-                            export_path.unlink()
                         except Exception as e:
                             st.error(f"Export failed: {str(e)}")
                     
                     if st.button("🗑️ Delete", key=f"delete_{i}", type="secondary"):
                         if st.session_state.get(f'confirm_delete_{i}'):
                             if km.delete_key(key['name']):
+                                # Drop every cached copy of key material: ciphers and pasted keys
+                                clear_key_cache()
+                                key_from_b64.clear()
                                 st.success(f"Deleted {key['name']}")
                                 st.rerun()
                             else:
@@ -102,8 +98,8 @@ with tab1:
                             st.session_state[f'confirm_delete_{i}'] = True
                             st.warning("Click again to confirm deletion")
 
-# Tab 2: Generate New Key
-with tab2:
+@st.fragment
+def generate_key_fragment(km):
     st.markdown("### ➕ Generate New Encryption Key")
     
     st.info("""
@@ -142,28 +138,38 @@ with tab2:
                     # Save
                     filepath = km.save_key(new_key, key_name, key_description)
                     
-                    # Success
-                    st.success(f"✅ **Key generated successfully!**")
-                    
-                    st.markdown(f"""
-                    **Name:** {key_name}  
-                    **Fingerprint:** `{fingerprint}`  
-                    **File:** {filepath.name}
-                    """)
-                    
-                    # Show key (with warning)
-                    with st.expander("🔍 View Generated Key (Click to expand)"):
-                        key_str = km.key_to_string(new_key)
-                        st.code(key_str, language=None)
-                        st.error("⚠️ **IMPORTANT:** Save this key in a secure location. You'll need it to decrypt your data!")
-                    
-                    st.balloons()
+                    # Rerun the whole page so the other tabs and sidebar see the key
+                    st.session_state['generated_key'] = {
+                        'name': key_name,
+                        'fingerprint': fingerprint,
+                        'file': filepath.name,
+                        'key': km.key_to_string(new_key)
+                    }
+                    st.rerun()
                     
                 except Exception as e:
                     st.error(f"❌ Generation failed: {str(e)}")
+    
+    generated = st.session_state.pop('generated_key', None)
+    if generated:
+        # Success
+        st.success(f"✅ **Key generated successfully!**")
+        
+        st.markdown(f"""
+        **Name:** {generated['name']}  
+        **Fingerprint:** `{generated['fingerprint']}`  
+        **File:** {generated['file']}
+        """)
+        
+        # Show key (with warning)
+        with st.expander("🔍 View Generated Key (Click to expand)"):
+            st.code(generated['key'], language=None)
+            st.error("⚠️ **IMPORTANT:** Save this key in a secure location. You'll need it to decrypt your data!")
+        
+        st.balloons()
 
-# Tab 3: Import Key
-with tab3:
+@st.fragment
+def import_key_fragment(km):
     st.markdown("### 📥 Import Encryption Key")
     
     st.info("""
@@ -185,7 +191,8 @@ with tab3:
             help="Upload exported key file"
         )
         
-        if uploaded_key_file:
+        # Import each uploaded file once, not on every rerun while it stays selected
+        if uploaded_key_file and st.session_state.get('imported_file_id') != uploaded_key_file.file_id:
             try:
                 # Save temporarily
                 temp_path = Path("keys") / "temp_import.json"
@@ -198,8 +205,9 @@ with tab3:
                 # Clean up
                 temp_path.unlink()
                 
-                st.success(f"✅ **Successfully imported key:** {key_name}")
-                st.balloons()
+                st.session_state['imported_file_id'] = uploaded_key_file.file_id
+                st.session_state['imported_key'] = {'name': key_name}
+                st.rerun()
                 
             except Exception as e:
                 st.error(f"❌ Import failed: {str(e)}")
@@ -237,18 +245,31 @@ with tab3:
                         # Save
                         filepath = km.save_key(key_bytes, new_key_name, import_desc)
                         
-                        st.success(f"✅ **Key imported successfully!**")
-                        st.markdown(f"""
-                        **Name:** {new_key_name}  
-                        **Fingerprint:** `{fingerprint}`  
-                        **File:** {filepath.name}
-                        """)
+                        st.session_state['imported_key'] = {
+                            'name': new_key_name,
+                            'fingerprint': fingerprint,
+                            'file': filepath.name
+                        }
+                        st.rerun()
                         
                     except Exception as e:
                         st.error(f"❌ Invalid key: {str(e)}")
+    
+    imported = st.session_state.pop('imported_key', None)
+    if imported:
+        if 'fingerprint' in imported:
+            st.success(f"✅ **Key imported successfully!**")
+            st.markdown(f"""
+            **Name:** {imported['name']}  
+            **Fingerprint:** `{imported['fingerprint']}`  
+            **File:** {imported['file']}
+            """)
+        else:
+            st.success(f"✅ **Successfully imported key:** {imported['name']}")
+            st.balloons()
 
-# Tab 4: Export Keys
-with tab4:
+@st.fragment
+def export_key_fragment(km):
     st.markdown("### 📤 Export Encryption Keys")
     
     st.warning("""
@@ -260,7 +281,7 @@ with tab4:
     - Keep backups in multiple secure locations
     """)
     
-    keys = km.list_keys()
+    keys = get_key_list(km)
     
     if not keys:
         st.info("No keys available to export")
@@ -302,11 +323,30 @@ with tab4:
                 
                 st.caption(f"Fingerprint: `{meta['fingerprint']}`")
 
+# Tabs
+tab1, tab2, tab3, tab4 = st.tabs(["📋 All Keys", "➕ Generate New", "📥 Import", "📤 Export"])
+
+# Tab 1: All Keys
+with tab1:
+    all_keys_fragment(km)
+
+# Tab 2: Generate New Key
+with tab2:
+    generate_key_fragment(km)
+
+# Tab 3: Import Key
+with tab3:
+    import_key_fragment(km)
+
+# Tab 4: Export Keys
+with tab4:
+    export_key_fragment(km)
+
 # Sidebar
 with st.sidebar:
     st.markdown("### 📊 Key Statistics")
     
-    keys = km.list_keys()
+    keys = get_key_list(km)
     st.metric("Total Keys", len(keys))
     
     if keys:
@@ -3,14 +3,13 @@ Analytics Page - View Usage Statistics
 """
 
 import streamlit as st
-from pathlib import Path
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
 import pandas as pd
 
 from utils.analytics import Analytics
-from utils.key_manager import KeyManager
+from utils.cache import get_css_text, get_key_manager, get_key_list, get_stats
 
 st.set_page_config(
     page_title="Analytics - SecureStego",
@@ -20,13 +19,34 @@ st.set_page_config(
 
 # Load CSS
 def load_css():
-    css_file = Path("styles/main.css")
-    if css_file.exists():
-        with open(css_file) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    css_text = get_css_text()
+    if css_text:
+        st.markdown(f'<style>{css_text}</style>', unsafe_allow_html=True)
 
 load_css()
 
+@st.cache_data(show_spinner=False)
+def key_overview(key_rows: tuple):
+    """
+    Creation-date counts and table rows for the saved keys
+    
+    key_rows is a tuple of (name, fingerprint, algorithm, created) so the
+    result is reused until the key list changes.
+    """
+    key_dates = []
+    display_keys = []
+    for name, fingerprint, algorithm, created in key_rows:
+        if created and 'T' in created:
+            key_dates.append(created.split('T')[0])
+        display_keys.append({
+            'Name': name,
+            'Fingerprint': fingerprint[:12] + "...",
+            'Algorithm': algorithm
+        })
+    
+    date_counts = pd.Series(key_dates).value_counts().sort_index() if key_dates else None
+    return date_counts, display_keys
+
 st.markdown("""
 <div class="stego-header">
     <h1>📊 Analytics Dashboard</h1>
@@ -35,9 +55,9 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Get statistics
-stats = Analytics.get_statistics()
-km = KeyManager()
-keys = km.list_keys()
+stats = get_stats()
+km = get_key_manager()
+keys = get_key_list(km)
 
 # Overview Metrics
 st.markdown("### 📈 Overview")
@@ -124,9 +144,8 @@ st.markdown("### 🕒 Recent Operations")
 
 if stats['recent_operations']:
     for op in stats['recent_operations'][:10]:
-        timestamp = op['timestamp'].split('T')
-        date = timestamp[0]
-        time = timestamp[1].split('.')[0] if len(timestamp) > 1 else ''
+        date = op['_date']
+        time = op['_time']
         
         op_type = op['type']
         details = op['details']
@@ -161,24 +180,17 @@ st.markdown("---")
 st.markdown("### 🔑 Key Statistics")
 
 if keys:
-    key_df = pd.DataFrame(keys)
+    date_counts, display_keys = key_overview(tuple(
+        (key['name'], key['fingerprint'], key['algorithm'], key.get('created', ''))
+        for key in keys
+    ))
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### Keys by Creation Date")
         
-        # Parse dates
-        key_dates = []
-        for key in keys:
-            created = key.get('created', '')
-            if created and 'T' in created:
-                date = created.split('T')[0]
-                key_dates.append(date)
-        
-        if key_dates:
-            date_counts = pd.Series(key_dates).value_counts().sort_index()
-            
+        if date_counts is not None:
             fig_line = go.Figure(data=[go.Scatter(
                 x=date_counts.index,
                 y=date_counts.values,
@@ -201,14 +213,6 @@ if keys:
     with col2:
         st.markdown("#### All Keys")
         
-        display_keys = []
-        for key in keys:
-            display_keys.append({
-                'Name': key['name'],
-                'Fingerprint': key['fingerprint'][:12] + "...",
-                'Algorithm': key['algorithm']
-            })
-        
         st.dataframe(display_keys, hide_index=True, use_container_width=True)
 
 else:
@@ -223,7 +227,7 @@ with st.sidebar:
     
     if st.button("🗑️ Clear Analytics", use_container_width=True):
         if st.session_state.get('confirm_clear'):
-            Analytics.ANALYTICS_FILE.unlink(missing_ok=True)
+            Analytics.clear()
             st.success("Analytics cleared!")
             st.rerun()
         else:
@@ -3,16 +3,57 @@ Analytics and Statistics Module
 """
 
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List
-import pandas as pd
+from typing import Dict, Iterable, List
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used as a fallback
+    orjson = None
+
+# Streamlit runs each session's script in its own thread; this serializes the
+# read-append-count-save sequence so the summary never drifts from the log
+_LOCK = threading.RLock()
+
+
+def _dump_line(log_entry: Dict) -> bytes:
+    """One compact JSON Lines record, newline included"""
+    if orjson is not None:
+        return orjson.dumps(log_entry) + b'\n'
+    return json.dumps(log_entry, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _load_line(line: bytes) -> Dict:
+    """Parse one JSON Lines record"""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def _load_lines(lines: Iterable[bytes]) -> List[Dict]:
+    """Parse JSON Lines records, skipping blank, torn or corrupt lines"""
+    logs = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            logs.append(_load_line(line))
+        except ValueError:  # orjson.JSONDecodeError and json's both subclass it
+            continue
+    return logs
 
 
 class Analytics:
     """Track and analyze steganography operations"""
     
-    ANALYTICS_FILE = Path("analytics.json")
+    ANALYTICS_FILE = Path("analytics.jsonl")
+    LEGACY_FILE = Path("analytics.json")  # pre-JSON Lines log, migrated on first use
+    SUMMARY_FILE = Path("analytics_summary.json")  # running totals over the log
+    TAIL_CHUNK_SIZE = 4096
     
     @staticmethod
     def log_operation(operation_type: str, details: Dict):
@@ -23,28 +64,140 @@ class Analytics:
             'details': details
         }
         
-        # Load existing logs
-        logs = Analytics.load_logs()
-        logs.append(log_entry)
-        
-        # Save
-        with open(Analytics.ANALYTICS_FILE, 'w') as f:
-            json.dump(logs, f, indent=2)
+        with _LOCK:
+            Analytics._migrate_legacy_log()
+            summary = Analytics._load_summary()
+            
+            # Append one line; existing entries are never rewritten
+            with open(Analytics.ANALYTICS_FILE, 'ab') as f:
+                f.write(_dump_line(log_entry))
+            
+            Analytics._count(summary, log_entry)
+            summary['log_bytes'] = Analytics.ANALYTICS_FILE.stat().st_size
+            Analytics._save_summary(summary)
     
     @staticmethod
     def load_logs() -> List[Dict]:
         """Load all logs"""
-        if Analytics.ANALYTICS_FILE.exists():
-            with open(Analytics.ANALYTICS_FILE, 'r') as f:
-                return json.load(f)
-        return []
+        Analytics._migrate_legacy_log()
+        
+        if not Analytics.ANALYTICS_FILE.exists():
+            return []
+        with open(Analytics.ANALYTICS_FILE, 'rb') as f:
+            return _load_lines(f)
+    
+    @staticmethod
+    def tail(n: int = 10) -> List[Dict]:
+        """
+        Last n logged operations, newest first
+        
+        Reads the log backwards in fixed-size chunks, so the cost does not
+        grow with the length of the log.
+        """
+        Analytics._migrate_legacy_log()
+        
+        if n <= 0 or not Analytics.ANALYTICS_FILE.exists():
+            return []
+        
+        with open(Analytics.ANALYTICS_FILE, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            data = b''
+            # n + 1 newlines guarantee the last n lines are complete
+            while pos > 0 and data.count(b'\n') <= n:
+                step = min(Analytics.TAIL_CHUNK_SIZE, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        
+        lines = [line for line in data.splitlines() if line.strip()]
+        return _load_lines(lines[-n:])[::-1]
+    
+    @staticmethod
+    def clear():
+        """Delete the log and its summary"""
+        with _LOCK:
+            Analytics.ANALYTICS_FILE.unlink(missing_ok=True)
+            Analytics.SUMMARY_FILE.unlink(missing_ok=True)
+            Analytics.LEGACY_FILE.unlink(missing_ok=True)
+    
+    @staticmethod
+    def _migrate_legacy_log():
+        """Convert an old analytics.json array into the JSON Lines file"""
+        with _LOCK:
+            if not Analytics.LEGACY_FILE.exists() or Analytics.ANALYTICS_FILE.exists():
+                return
+            
+            with open(Analytics.LEGACY_FILE, 'r') as f:
+                logs = json.load(f)
+            with open(Analytics.ANALYTICS_FILE, 'wb') as f:
+                for log_entry in logs:
+                    f.write(_dump_line(log_entry))
+            Analytics.LEGACY_FILE.unlink(missing_ok=True)
+    
+    @staticmethod
+    def _count(summary: Dict, log_entry: Dict):
+        """Add one log entry to the running totals"""
+        summary['total_operations'] += 1
+        op_type = log_entry.get('type')
+        if op_type == 'hide':
+            summary['hide_operations'] += 1
+            summary['total_payload_kb'] += log_entry.get('details', {}).get('payload_kb', 0)
+        elif op_type == 'reveal':
+            summary['reveal_operations'] += 1
+    
+    @staticmethod
+    def _load_summary() -> Dict:
+        """
+        Running totals for the current log
+        
+        The summary records the log size it was computed for; if the log was
+        changed behind its back (or the summary is missing), it is rebuilt
+        with one full pass over the log.
+        """
+        with _LOCK:
+            log_bytes = Analytics.ANALYTICS_FILE.stat().st_size if Analytics.ANALYTICS_FILE.exists() else 0
+            
+            if Analytics.SUMMARY_FILE.exists():
+                try:
+                    with open(Analytics.SUMMARY_FILE, 'r') as f:
+                        summary = json.load(f)
+                    if summary.get('log_bytes') == log_bytes:
+                        return summary
+                except (OSError, ValueError):
+                    pass
+            
+            summary = {
+                'total_operations': 0,
+                'hide_operations': 0,
+                'reveal_operations': 0,
+                'total_payload_kb': 0.0,
+                'log_bytes': log_bytes
+            }
+            for log_entry in Analytics.load_logs():
+                Analytics._count(summary, log_entry)
+            
+            if log_bytes:
+                Analytics._save_summary(summary)
+            return summary
+    
+    @staticmethod
+    def _save_summary(summary: Dict):
+        """Write the summary via a temp file so readers never see half of it"""
+        # A unique temp name per write, so concurrent writers never share one
+        with tempfile.NamedTemporaryFile('w', dir=Analytics.SUMMARY_FILE.parent,
+                                         prefix=Analytics.SUMMARY_FILE.stem + '.',
+                                         suffix='.tmp', delete=False) as f:
+            json.dump(summary, f)
+        os.replace(f.name, Analytics.SUMMARY_FILE)
     
     @staticmethod
     def get_statistics() -> Dict:
         """Calculate statistics from logs"""
-        logs = Analytics.load_logs()
+        Analytics._migrate_legacy_log()
+        summary = Analytics._load_summary()
         
-        if not logs:
+        if not summary['total_operations']:
             return {
                 'total_operations': 0,
                 'hide_operations': 0,
@@ -54,24 +207,24 @@ class Analytics:
                 'recent_operations': []
             }
         
-        df = pd.DataFrame(logs)
-        
-        hide_ops = df[df['type'] == 'hide']
-        reveal_ops = df[df['type'] == 'reveal']
+        hide_count = summary['hide_operations']
+        total_payload_kb = summary['total_payload_kb']
         
-        total_data_mb = 0
-        if len(hide_ops) > 0:
-            total_data_mb = sum([op.get('payload_kb', 0) for op in hide_ops['details']]) / 1024
+        total_data_mb = total_payload_kb / 1024
+        avg_payload_kb = total_payload_kb / hide_count if hide_count else 0
         
-        avg_payload_kb = 0
-        if len(hide_ops) > 0:
-            avg_payload_kb = sum([op.get('payload_kb', 0) for op in hide_ops['details']]) / len(hide_ops)
+        # Split timestamps once here, not in the page's render loop
+        recent_operations = Analytics.tail(10)
+        for op in recent_operations:
+            date, _, time = op.get('timestamp', '').partition('T')
+            op['_date'] = date
+            op['_time'] = time.partition('.')[0]
         
         return {
-            'total_operations': len(logs),
-            'hide_operations': len(hide_ops),
-            'reveal_operations': len(reveal_ops),
+            'total_operations': summary['total_operations'],
+            'hide_operations': hide_count,
+            'reveal_operations': summary['reveal_operations'],
             'total_data_hidden_mb': round(total_data_mb, 2),
             'avg_payload_size_kb': round(avg_payload_kb, 2),
-            'recent_operations': logs[-10:][::-1]
+            'recent_operations': recent_operations
         }
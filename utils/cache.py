@@ -0,0 +1,95 @@
+"""
+Streamlit Cache Helpers
+Shared cached resources so page reruns skip repeated disk I/O
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import streamlit as st
+
+from utils.analytics import Analytics
+from utils.key_manager import KeyManager
+
+
+@st.cache_resource
+def get_key_manager() -> KeyManager:
+    """
+    Shared KeyManager instance (created once per process)
+
+    KeyManager keeps no per-session state; its only memo is the parsed
+    listing, whose entries are validated against each file's (mtime, size)
+    and replaced wholesale, so one instance is safe to share across script
+    threads.
+    """
+    return KeyManager()
+
+
+@st.cache_data
+def get_css_text() -> str:
+    """Read custom stylesheet once per process"""
+    css_file = Path("styles/main.css")
+    if css_file.exists():
+        return css_file.read_text()
+    return ""
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _stats_for(log_state: Tuple[int, int]) -> Dict:
+    """Analytics.get_statistics memoized on (mtime_ns, size) of the log"""
+    return Analytics.get_statistics()
+
+
+def get_stats() -> Dict:
+    """
+    Analytics summary, recomputed only when the log file changes
+    
+    Logging an operation or clearing analytics changes the file's mtime and
+    size, so no explicit invalidation is needed.
+    """
+    try:
+        log_stat = os.stat(Analytics.ANALYTICS_FILE)
+        log_state = (log_stat.st_mtime_ns, log_stat.st_size)
+    except FileNotFoundError:
+        log_state = (0, 0)
+    return _stats_for(log_state)
+
+
+def get_key_list(km: KeyManager) -> List[Dict]:
+    """
+    Saved key listing for the pages
+
+    Not cached here: KeyManager.list_keys() only re-parses key files whose
+    (mtime, size) changed, so every session sees keys re-saved in place.
+    """
+    return km.list_keys()
+
+
+@st.cache_data(show_spinner=False)
+def cached_validate(image_bytes: bytes) -> Tuple[bool, str, Dict]:
+    """StegoEngine.validate_image memoized on the uploaded file contents"""
+    from utils.stego_engine import StegoEngine
+    return StegoEngine.validate_image(image_bytes)
+
+
+@st.cache_data(show_spinner=False)
+def cached_open_metadata(image_bytes: bytes) -> Tuple[int, int, str]:
+    """(width, height, format) of an uploaded image, decoded once"""
+    from PIL import Image
+    img = Image.open(io.BytesIO(image_bytes))
+    width, height = img.size
+    return width, height, img.format or "Unknown"
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=900)
+def key_from_b64(key_string: str) -> Tuple[bytes, str]:
+    """
+    Decode a pasted base64 key and fingerprint it once per distinct input
+    
+    The cache holds raw key bytes, so it is bounded, expires after 15 minutes,
+    and is cleared whenever a key is deleted.
+    """
+    key = KeyManager.string_to_key(key_string)
+    return key, KeyManager.get_key_fingerprint(key)
@@ -8,12 +8,24 @@ import os
 import base64
 import json
 import hashlib
+import functools
+import struct
 from datetime import datetime
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
 from cryptography.exceptions import InvalidTag
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, Optional, Union
+
+
+@functools.lru_cache(maxsize=16)
+def _aesgcm(key: bytes) -> AESGCM:
+    """AESGCM instance per key, so the key schedule is set up once"""
+    return AESGCM(key)
+
+
+def clear_key_cache():
+    """Drop cached AESGCM/CryptoEngine instances (call when a key is deleted)"""
+    _aesgcm.cache_clear()
+    _engine_for.cache_clear()
 
 
 class CryptoEngine:
@@ -24,13 +36,17 @@ class CryptoEngine:
     NONCE_SIZE = 12  # 96 bits (optimal for GCM)
     TAG_SIZE = 16  # 128 bits
     PBKDF2_ITERATIONS = 600_000  # OWASP 2023 standard
+    BUNDLE_FORMAT = 2  # leading byte of binary bundles; JSON bundles start with '{'
+    HEADER_SIZE = 3  # format byte + 2-byte AAD length
+    # Longest isoformat() timestamp; only its length matters to estimates
+    TIMESTAMP_PLACEHOLDER = '0000-00-00T00:00:00.000000'
     
     def __init__(self, key: bytes):
         """Initialize with 256-bit key"""
         if len(key) != self.KEY_SIZE:
             raise ValueError(f"Key must be {self.KEY_SIZE} bytes")
-        self.aesgcm = AESGCM(key)
-        self.key_hash = hashlib.sha256(key).hexdigest()[:16]
+        self.aesgcm = _aesgcm(key)
+        self.key_hash = hashlib.sha256(key).digest()[:8].hex()
     
     @staticmethod
     def derive_key_from_password(password: str, salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
@@ -47,21 +63,25 @@ class CryptoEngine:
         if salt is None:
             salt = os.urandom(16)
         
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=CryptoEngine.KEY_SIZE,
-            salt=salt,
-            iterations=CryptoEngine.PBKDF2_ITERATIONS
+        key = hashlib.pbkdf2_hmac(
+            'sha256',
+            password.encode('utf-8'),
+            salt,
+            CryptoEngine.PBKDF2_ITERATIONS,
+            dklen=CryptoEngine.KEY_SIZE
         )
-        key = kdf.derive(password.encode('utf-8'))
         return key, salt
     
-    def encrypt(self, plaintext: bytes, metadata: Optional[Dict] = None) -> Dict[str, str]:
+    def encrypt(self, plaintext: Union[bytes, memoryview], metadata: Optional[Dict] = None) -> bytes:
         """
         Encrypt data with AES-GCM
         
+        Args:
+            plaintext: Any bytes-like object; passed to AESGCM without copying
+        
         Returns:
-            Dictionary with version, timestamp, nonce, ciphertext, tag
+            Binary bundle: format byte, AAD length (2 bytes, big-endian),
+            AAD (canonical metadata JSON), nonce, ciphertext || tag
         """
         # Generate random nonce
         nonce = os.urandom(self.NONCE_SIZE)
@@ -76,42 +96,65 @@ class CryptoEngine:
         })
         
         # Authenticated data (not encrypted, but verified)
-        aad = json.dumps(meta, sort_keys=True).encode('utf-8')
+        aad = self._canonical_aad(meta)
         
-        # Encrypt
+        # Encrypt (AESGCM appends the tag to the ciphertext)
         ciphertext = self.aesgcm.encrypt(nonce, plaintext, aad)
         
-        # Split ciphertext and tag
-        ct = ciphertext[:-self.TAG_SIZE]
-        tag = ciphertext[-self.TAG_SIZE:]
-        
-        return {
-            'version': self.VERSION,
-            'metadata': base64.b64encode(aad).decode('utf-8'),
-            'nonce': base64.b64encode(nonce).decode('utf-8'),
-            'ciphertext': base64.b64encode(ct).decode('utf-8'),
-            'tag': base64.b64encode(tag).decode('utf-8')
-        }
+        header = struct.pack('>BH', self.BUNDLE_FORMAT, len(aad))
+        return b''.join((header, aad, nonce, ciphertext))
     
-    def decrypt(self, bundle: Dict[str, str]) -> Tuple[bytes, Dict]:
+    def decrypt(self, bundle: Union[bytes, memoryview, Dict]) -> Tuple[bytes, Dict]:
         """
         Decrypt and verify AES-GCM encrypted data
         
+        Accepts the binary bundle from encrypt(), and also the older JSON
+        bundles (as bytes or an already parsed dict).
+        
         Returns:
             (plaintext, metadata) tuple
         
         Raises:
             InvalidTag: If authentication fails
         """
+        if isinstance(bundle, dict):
+            return self._decrypt_fields(bundle)
+        if bundle[:1] == b'{':
+            return self._decrypt_fields(json.loads(bytes(bundle).decode('utf-8')))
+        
+        if len(bundle) < self.HEADER_SIZE or bundle[0] != self.BUNDLE_FORMAT:
+            raise ValueError("Unsupported or corrupted bundle")
+        
+        _, aad_size = struct.unpack_from('>BH', bundle)
+        nonce_start = self.HEADER_SIZE + aad_size
+        if len(bundle) < nonce_start + self.NONCE_SIZE + self.TAG_SIZE:
+            raise ValueError("Unsupported or corrupted bundle")
+        # Slice the ciphertext through a memoryview: AESGCM reads it in place,
+        # only the small AAD and nonce are copied out
+        view = memoryview(bundle)
+        aad = bytes(view[self.HEADER_SIZE:nonce_start])
+        nonce = bytes(view[nonce_start:nonce_start + self.NONCE_SIZE])
+        full_ct = view[nonce_start + self.NONCE_SIZE:]
+        
+        return self._open(nonce, full_ct, aad)
+    
+    def _decrypt_fields(self, bundle: Dict) -> Tuple[bytes, Dict]:
+        """Decrypt a JSON bundle with base64 nonce/ciphertext/tag fields"""
         # Decode components
         nonce = base64.b64decode(bundle['nonce'])
         ct = base64.b64decode(bundle['ciphertext'])
         tag = base64.b64decode(bundle['tag'])
-        aad = base64.b64decode(bundle['metadata'])
+        if isinstance(bundle['metadata'], str):
+            # Older bundles carried the AAD bytes base64-encoded
+            aad = base64.b64decode(bundle['metadata'])
+        else:
+            aad = self._canonical_aad(bundle['metadata'])
         
         # Reconstruct full ciphertext
-        full_ct = ct + tag
-        
+        return self._open(nonce, ct + tag, aad)
+    
+    def _open(self, nonce: bytes, full_ct: Union[bytes, memoryview], aad: bytes) -> Tuple[bytes, Dict]:
+        """Verify and decrypt ciphertext || tag, then check the key hash"""
         try:
             # Decrypt and verify
             plaintext = self.aesgcm.decrypt(nonce, full_ct, aad)
@@ -129,27 +172,65 @@ class CryptoEngine:
             raise ValueError("Authentication failed: Invalid key or tampered data")
     
     @staticmethod
-    def create_bundle_string(bundle: Dict[str, str]) -> str:
-        """Convert bundle to base64-encoded JSON string"""
-        json_str = json.dumps(bundle, separators=(',', ':'))
-        return base64.b64encode(json_str.encode('utf-8')).decode('utf-8')
+    def _canonical_aad(meta: Dict) -> bytes:
+        """Byte-stable JSON encoding of metadata, authenticated as AAD"""
+        return json.dumps(meta, sort_keys=True, separators=(',', ':')).encode('utf-8')
     
     @staticmethod
-    def parse_bundle_string(bundle_str: str) -> Dict[str, str]:
-        """Parse base64-encoded JSON string to bundle"""
-        json_str = base64.b64decode(bundle_str).decode('utf-8')
-        return json.loads(json_str)
+    def estimate_bundle_size(plaintext_size: int, metadata: Optional[Dict] = None) -> int:
+        """
+        Size of the encrypt() output for a payload, before encrypting
+        
+        Mirrors encrypt(): metadata gains version/timestamp/key_hash/size and
+        becomes the AAD; the rest is fixed-size header, nonce and tag.
+        """
+        meta = dict(metadata or {})
+        meta.update({
+            'version': CryptoEngine.VERSION,
+            'timestamp': CryptoEngine.TIMESTAMP_PLACEHOLDER,
+            'key_hash': '0' * 16,
+            'size': plaintext_size
+        })
+        aad_size = len(CryptoEngine._canonical_aad(meta))
+        
+        return (
+            CryptoEngine.HEADER_SIZE
+            + aad_size
+            + CryptoEngine.NONCE_SIZE
+            + plaintext_size
+            + CryptoEngine.TAG_SIZE
+        )
+    
+    @staticmethod
+    def create_bundle_string(bundle: bytes) -> str:
+        """Convert binary bundle to a base64 string (for text-only carriers)"""
+        return base64.b64encode(bundle).decode('utf-8')
+    
+    @staticmethod
+    def parse_bundle_string(bundle_str: str) -> bytes:
+        """Parse base64 string back to bundle bytes"""
+        return base64.b64decode(bundle_str)
+
+
+@functools.lru_cache(maxsize=16)
+def _engine_for(key: bytes) -> CryptoEngine:
+    """
+    CryptoEngine per key, so repeated quick_* calls skip the key hash too
+    
+    Engines hold only the AESGCM object and key hash, so sharing one
+    between callers is safe.
+    """
+    return CryptoEngine(key)
 
 
-def quick_encrypt(key: bytes, data: bytes, metadata: Optional[Dict] = None) -> str:
-    """Quick encryption returning bundle string"""
-    crypto = CryptoEngine(key)
-    bundle = crypto.encrypt(data, metadata)
-    return crypto.create_bundle_string(bundle)
+def quick_encrypt(key: bytes, data: Union[bytes, memoryview], metadata: Optional[Dict] = None) -> bytes:
+    """Quick encryption returning raw bundle bytes"""
+    return _engine_for(key).encrypt(data, metadata)
 
 
-def quick_decrypt(key: bytes, bundle_str: str) -> Tuple[bytes, Dict]:
-    """Quick decryption from bundle string"""
-    crypto = CryptoEngine(key)
-    bundle = crypto.parse_bundle_string(bundle_str)
-    return crypto.decrypt(bundle)
+def quick_decrypt(key: bytes, bundle_data: Union[bytes, str]) -> Tuple[bytes, Dict]:
+    """Quick decryption from raw bundle bytes (or a base64 bundle string)"""
+    crypto = _engine_for(key)
+    if isinstance(bundle_data, str):
+        bundle_data = crypto.parse_bundle_string(bundle_data)
+    return crypto.decrypt(bundle_data)
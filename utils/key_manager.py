@@ -6,21 +6,49 @@ Handles secure key generation, storage, and retrieval
 import os
 import secrets
 import base64
+import binascii
 import json
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import hashlib
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used as a fallback
+    orjson = None
+
+
+def _dump_json(obj: Dict, pretty: bool = False) -> bytes:
+    """Key-file JSON, compact unless pretty (2-space indent) is asked for"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else None)
+    if pretty:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _load_json(data: bytes) -> Dict:
+    """Parse key-file JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class KeyManager:
     """Secure key management with metadata"""
     
     KEYS_DIR = Path("keys")
     KEY_SIZE = 32  # 256 bits
+    KEY_STRING_LENGTH = 44  # padded base64 of KEY_SIZE bytes
+    # Version tag on fingerprints; keys saved before it carry a bare
+    # 16-hex SHA-256 fingerprint in their metadata
+    FINGERPRINT_PREFIX = "B2-"
     
     def __init__(self):
         self.KEYS_DIR.mkdir(exist_ok=True)
+        # filename -> ((mtime_ns, size), listing entry) from the last list_keys()
+        self._listing_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
     
     @staticmethod
     def generate_key() -> bytes:
@@ -35,21 +63,42 @@ class KeyManager:
     @staticmethod
     def string_to_key(key_string: str) -> bytes:
         """Convert base64 string to binary key"""
+        if not isinstance(key_string, (str, bytes)):
+            raise ValueError(f"Invalid key format: expected a base64 string, "
+                             f"got {type(key_string).__name__}")
+        # Drop all whitespace, including line breaks inside a pasted key
+        key_string = key_string[:0].join(key_string.split())
+        # Any other length cannot decode to KEY_SIZE bytes; reject it before decoding
+        if len(key_string) != KeyManager.KEY_STRING_LENGTH:
+            raise ValueError(f"Invalid key format: expected {KeyManager.KEY_STRING_LENGTH} "
+                             f"base64 characters, got {len(key_string)}")
         try:
-            key = base64.b64decode(key_string)
-            if len(key) != KeyManager.KEY_SIZE:
-                raise ValueError(f"Invalid key size: {len(key)} bytes")
-            return key
-        except Exception as e:
+            key = base64.b64decode(key_string, validate=True)
+        except (binascii.Error, ValueError) as e:
             raise ValueError(f"Invalid key format: {str(e)}")
+        if len(key) != KeyManager.KEY_SIZE:
+            raise ValueError(f"Invalid key format: Invalid key size: {len(key)} bytes")
+        return key
     
     @staticmethod
     def get_key_fingerprint(key: bytes) -> str:
-        """Generate SHA-256 fingerprint of key"""
-        return hashlib.sha256(key).hexdigest()[:16].upper()
+        """Generate BLAKE2b-64 fingerprint of key (display/lookup only)"""
+        digest = hashlib.blake2b(key, digest_size=8).hexdigest().upper()
+        return KeyManager.FINGERPRINT_PREFIX + digest
     
-    def save_key(self, key: bytes, name: str, description: str = "") -> Path:
-        """Save key with metadata"""
+    @staticmethod
+    def _legacy_fingerprint(key: bytes) -> str:
+        """SHA-256 fingerprint that key files were named by before FINGERPRINT_PREFIX"""
+        return hashlib.sha256(key).digest()[:8].hex().upper()
+    
+    def save_key(self, key: bytes, name: str, description: str = "", *,
+                 pretty: bool = False) -> Path:
+        """
+        Save key with metadata
+        
+        Key files are written as compact JSON; pass pretty=True for an
+        indented, hand-editable file.
+        """
         fingerprint = self.get_key_fingerprint(key)
         
         key_data = {
@@ -68,77 +117,101 @@ class KeyManager:
         filename = f"{safe_name}_{fingerprint}.key.json"
         filepath = self.KEYS_DIR / filename
         
-        with open(filepath, 'w') as f:
-            json.dump(key_data, f, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(_dump_json(key_data, pretty))
+        
+        # Re-saving a key from before BLAKE2b fingerprints replaces its old file
+        # rather than leaving a second copy under the SHA-256 name
+        legacy_path = self.KEYS_DIR / f"{safe_name}_{self._legacy_fingerprint(key)}.key.json"
+        legacy_path.unlink(missing_ok=True)
         
         return filepath
     
-    def load_key(self, identifier: str) -> Tuple[bytes, Dict]:
-        """
-        Load key by name, filename, or fingerprint
-        
-        Returns:
-            (key_bytes, metadata)
-        """
+    def _resolve(self, identifier: str) -> Path:
+        """Path of the key file for a name, filename, or fingerprint"""
         # Try exact filename
         filepath = self.KEYS_DIR / identifier
         if not filepath.exists():
             filepath = self.KEYS_DIR / f"{identifier}.key.json"
         
-        # Search by name or fingerprint
+        # Search by name or fingerprint; list_keys() only re-parses changed files
         if not filepath.exists():
-            for keyfile in self.KEYS_DIR.glob("*.key.json"):
-                with open(keyfile, 'r') as f:
-                    data = json.load(f)
-                    if data.get('name') == identifier or data.get('fingerprint') == identifier:
-                        filepath = keyfile
-                        break
+            for info in self.list_keys():
+                if info['name'] == identifier or info['fingerprint'] == identifier:
+                    filepath = self.KEYS_DIR / info['file']
+                    break
         
         if not filepath.exists():
             raise FileNotFoundError(f"Key not found: {identifier}")
+        return filepath
+    
+    def load_key(self, identifier: str) -> Tuple[bytes, Dict]:
+        """
+        Load key by name, filename, or fingerprint
+        
+        Returns:
+            (key_bytes, metadata)
+        """
+        filepath = self._resolve(identifier)
         
-        with open(filepath, 'r') as f:
-            key_data = json.load(f)
+        with open(filepath, 'rb') as f:
+            key_data = _load_json(f.read())
         
         key = self.string_to_key(key_data['key'])
         return key, key_data
     
     def list_keys(self) -> List[Dict]:
-        """List all saved keys with metadata"""
+        """
+        List all saved keys with metadata
+        
+        Entries are remembered per file with its (mtime, size), so only new or
+        changed key files are parsed again.
+        """
+        with os.scandir(self.KEYS_DIR) as it:
+            entries = sorted(
+                (e for e in it if e.name.endswith('.key.json') and not e.name.startswith('.')),
+                key=lambda e: e.name
+            )
+        
         keys = []
-        for keyfile in sorted(self.KEYS_DIR.glob("*.key.json")):
+        listing_cache = {}
+        for entry in entries:
             try:
-                with open(keyfile, 'r') as f:
-                    data = json.load(f)
-                    keys.append({
-                        'file': keyfile.name,
+                file_stat = entry.stat()
+                file_state = (file_stat.st_mtime_ns, file_stat.st_size)
+                cached = self._listing_cache.get(entry.name)
+                if cached and cached[0] == file_state:
+                    info = cached[1]
+                else:
+                    with open(entry.path, 'rb') as f:
+                        data = _load_json(f.read())
+                    info = {
+                        'file': entry.name,
                         'name': data.get('name', 'Unknown'),
                         'description': data.get('description', ''),
                         'fingerprint': data.get('fingerprint', ''),
                         'created': data.get('created', ''),
                         'algorithm': data.get('algorithm', 'Unknown')
-                    })
+                    }
+                listing_cache[entry.name] = (file_state, info)
+                keys.append(dict(info))
             except Exception:
                 continue
+        
+        # Replace rather than mutate, so deleted files drop out
+        self._listing_cache = listing_cache
         return keys
     
     def delete_key(self, identifier: str) -> bool:
         """Delete key by name, filename, or fingerprint"""
         try:
-            key, metadata = self.load_key(identifier)
-            
-            # Find and delete file
-            for keyfile in self.KEYS_DIR.glob("*.key.json"):
-                if keyfile.name == identifier or metadata['fingerprint'] in keyfile.name:
-                    keyfile.unlink()
-                    return True
-            
-            return False
+            self._resolve(identifier).unlink()
+            return True
         except Exception:
             return False
     
-    def export_key(self, identifier: str, export_path: str):
-        """Export key to file"""
+    def export_key_json(self, identifier: str) -> str:
+        """Serialize key and metadata in the export file format"""
         key, metadata = self.load_key(identifier)
         
         export_data = {
@@ -146,13 +219,19 @@ class KeyManager:
             'metadata': metadata
         }
         
+        return _dump_json(export_data, pretty=True).decode('utf-8')
+    
+    def export_key(self, identifier: str, export_path: str):
+        """Export key to file"""
+        export_json = self.export_key_json(identifier)
+        
         with open(export_path, 'w') as f:
-            json.dump(export_data, f, indent=2)
+            f.write(export_json)
     
     def import_key(self, import_path: str) -> str:
         """Import key from file"""
-        with open(import_path, 'r') as f:
-            import_data = json.load(f)
+        with open(import_path, 'rb') as f:
+            import_data = _load_json(f.read())
         
         key = self.string_to_key(import_data['key'])
         metadata = import_data.get('metadata', {})
@@ -4,44 +4,70 @@ Algorithm: Least Significant Bit substitution with capacity management
 """
 
 import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, List, Optional, Sequence, Union
 from PIL import Image
+import numpy as np
 import io
-from stegano import lsb
+import struct
 import hashlib
 
 
+@functools.lru_cache(maxsize=32)
+def _read_header(image_path: str, mtime_ns: int, file_size: int) -> Tuple[Tuple[int, int], str, Optional[str]]:
+    """(size, mode, format) of an image file, keyed on its stat so edits miss"""
+    with Image.open(image_path) as img:
+        return img.size, img.mode, img.format
+
+
+def _stat_header(image_path: str) -> Tuple[int, Tuple[Tuple[int, int], str, Optional[str]]]:
+    """(file_size, header) for a path via one os.stat and the header cache"""
+    image_path = os.fspath(image_path)
+    file_stat = os.stat(image_path)
+    return file_stat.st_size, _read_header(image_path, file_stat.st_mtime_ns, file_stat.st_size)
+
+
 class StegoEngine:
     """Production steganography engine with validation"""
     
     SUPPORTED_FORMATS = ['PNG', 'BMP', 'TIFF']
     MIN_DIMENSION = 100
     METADATA_OVERHEAD = 200  # bytes
+    LENGTH_PREFIX_SIZE = 4  # bytes, big-endian payload length
+    PNG_COMPRESS_LEVEL = 1  # zlib level for output PNGs; LSB noise barely compresses
     
     @staticmethod
-    def validate_image(image_path: str) -> Tuple[bool, str, Dict]:
+    def validate_image(image_source: Union[str, bytes]) -> Tuple[bool, str, Dict]:
         """
         Comprehensive image validation
         
+        Args:
+            image_source: Image file path or raw encoded image bytes
+        
         Returns:
             (is_valid, message, stats)
         """
         try:
-            if not os.path.exists(image_path):
-                return False, "Image file not found", {}
-            
-            img = Image.open(image_path)
-            width, height = img.size
-            format_name = img.format or "Unknown"
-            mode = img.mode
+            if isinstance(image_source, bytes):
+                file_size = len(image_source)
+                img = Image.open(io.BytesIO(image_source))
+                (width, height), mode, format_name = img.size, img.mode, img.format
+            else:
+                try:
+                    file_size, header = _stat_header(image_source)
+                except FileNotFoundError:
+                    return False, "Image file not found", {}
+                (width, height), mode, format_name = header
+            format_name = format_name or "Unknown"
             
             stats = {
                 'width': width,
                 'height': height,
                 'format': format_name,
                 'mode': mode,
-                'size_kb': os.path.getsize(image_path) / 1024,
+                'size_kb': file_size / 1024,
                 'pixels': width * height
             }
             
@@ -53,8 +79,8 @@ class StegoEngine:
             if width < StegoEngine.MIN_DIMENSION or height < StegoEngine.MIN_DIMENSION:
                 return False, f"❌ Image too small ({width}x{height}). Minimum: {StegoEngine.MIN_DIMENSION}x{StegoEngine.MIN_DIMENSION}", stats
             
-            # Calculate capacity
-            capacity = StegoEngine.calculate_capacity(image_path)
+            # Calculate capacity from the header already read
+            capacity = StegoEngine._capacity_for(width, height, mode)
             stats['capacity_bytes'] = capacity
             stats['capacity_kb'] = capacity / 1024
             
@@ -67,23 +93,39 @@ class StegoEngine:
             return False, f"❌ Invalid image: {str(e)}", {}
     
     @staticmethod
-    def calculate_capacity(image_path: str) -> int:
+    def calculate_capacity(image_path: Union[str, bytes, io.BytesIO]) -> int:
         """Calculate maximum payload capacity in bytes"""
-        img = Image.open(image_path)
-        width, height = img.size
-        
-        # Convert to RGB if needed
-        if img.mode not in ['RGB', 'RGBA']:
-            img = img.convert('RGB')
-        
+        if isinstance(image_path, bytes):
+            image_path = io.BytesIO(image_path)
+        if isinstance(image_path, io.BytesIO):
+            img = Image.open(image_path)
+            (width, height), mode = img.size, img.mode
+        else:
+            _, ((width, height), mode, _) = _stat_header(image_path)
+        return StegoEngine._capacity_for(width, height, mode)
+    
+    @staticmethod
+    def _capacity_for(width: int, height: int, mode: str) -> int:
+        """Capacity from image header fields alone (no pixel decode)"""
+        # Non-RGB modes are converted to RGB before embedding;
         # RGB has 3 channels, each can hide 1 bit in LSB
-        channels = 3 if img.mode == 'RGB' else 4
+        channels = 4 if mode == 'RGBA' else 3
         total_bits = width * height * channels
         
         # Convert to bytes and subtract overhead
         max_bytes = (total_bits // 8) - StegoEngine.METADATA_OVERHEAD
         return max_bytes
     
+    @staticmethod
+    def _clean_image(img: Image.Image) -> Image.Image:
+        """Convert to RGB/RGBA and drop metadata (EXIF, text chunks)"""
+        # Convert to RGB if needed
+        if img.mode not in ['RGB', 'RGBA']:
+            img = img.convert('RGB')
+        
+        # Strip metadata: rebuild from the raw pixel buffer, leaving img.info behind
+        return Image.frombytes(img.mode, img.size, img.tobytes())
+    
     @staticmethod
     def prepare_image(image_path: str, output_path: Optional[str] = None) -> str:
         """
@@ -92,40 +134,94 @@ class StegoEngine:
         Returns:
             Path to prepared image
         """
-        img = Image.open(image_path)
-        
-        # Convert to RGB if needed
-        if img.mode not in ['RGB', 'RGBA']:
-            img = img.convert('RGB')
-        
-        # Strip metadata
-        data = list(img.getdata())
-        clean_img = Image.new(img.mode, img.size)
-        clean_img.putdata(data)
+        clean_img = StegoEngine._clean_image(Image.open(image_path))
         
         # Save as PNG
         if output_path is None:
             output_path = str(Path(image_path).with_suffix('.png'))
         
-        clean_img.save(output_path, format='PNG', optimize=True)
+        clean_img.save(output_path, format='PNG', compress_level=StegoEngine.PNG_COMPRESS_LEVEL)
         return output_path
     
     @staticmethod
-    def hide(cover_path: str, secret_data: str, output_path: str, 
-             password: Optional[str] = None) -> Dict:
+    def _embed(img: Image.Image, payload: bytes) -> Image.Image:
+        """Write a 32-bit length prefix and the payload into channel LSBs"""
+        framed = struct.pack('>I', len(payload)) + payload
+        bits = np.unpackbits(np.frombuffer(framed, dtype=np.uint8))
+        
+        pixels = np.array(img, dtype=np.uint8)
+        flat = pixels.reshape(-1)
+        if bits.size > flat.size:
+            raise ValueError("Payload exceeds image capacity")
+        
+        # Channel values are written in the same order as img.tobytes(),
+        # most significant payload bit first
+        flat[:bits.size] &= 0xFE
+        flat[:bits.size] |= bits
+        
+        return Image.fromarray(pixels)
+    
+    @staticmethod
+    def _extract(img: Image.Image) -> bytes:
+        """Read the length-prefixed payload back out of channel LSBs"""
+        if img.mode not in ['RGB', 'RGBA']:
+            img = img.convert('RGB')
+        row_values = img.width * len(img.getbands())
+        total_values = row_values * img.height
+        
+        def read_lsbs(start: int, bit_count: int) -> bytes:
+            # Copy out only the rows that hold the requested channel values
+            rows = -(-(start + bit_count) // row_values)
+            flat = np.asarray(img.crop((0, 0, img.width, rows)), dtype=np.uint8).reshape(-1)
+            return np.packbits(flat[start:start + bit_count] & 1).tobytes()
+        
+        header_bits = StegoEngine.LENGTH_PREFIX_SIZE * 8
+        if total_values < header_bits:
+            raise ValueError("No hidden data detected in image")
+        
+        # Validate the length before touching the rest of the image
+        length = struct.unpack('>I', read_lsbs(0, header_bits))[0]
+        if length == 0 or header_bits + length * 8 > total_values:
+            raise ValueError("No hidden data detected in image")
+        
+        return read_lsbs(header_bits, length * 8)
+    
+    @staticmethod
+    def load_cover(cover_bytes: bytes) -> Image.Image:
         """
-        Hide encrypted data in image using LSB
+        Decode a cover image ahead of hide_bytes()
+        
+        Safe to run in a worker thread while the payload is encrypted.
+        No metadata stripping pass is needed: _embed() builds the stego
+        image from the pixel array alone.
+        """
+        img = Image.open(io.BytesIO(cover_bytes))
+        if img.mode not in ['RGB', 'RGBA']:
+            return img.convert('RGB')
+        img.load()
+        return img
+    
+    @staticmethod
+    def hide_bytes(cover_bytes: bytes, secret_data: bytes,
+                   cover_image: Optional[Image.Image] = None) -> Tuple[bytes, Dict]:
+        """
+        Hide encrypted data in an in-memory image using LSB
+        
+        Args:
+            cover_bytes: Encoded cover image (PNG/BMP/TIFF file contents)
+            secret_data: Payload bytes to embed
+            cover_image: Output of load_cover(cover_bytes), if already decoded
         
         Returns:
-            Statistics dictionary
+            (stego_png_bytes, stats)
         """
         # Validate
-        is_valid, msg, stats = StegoEngine.validate_image(cover_path)
+        is_valid, msg, stats = StegoEngine.validate_image(cover_bytes)
         if not is_valid:
             raise ValueError(msg)
         
         # Check capacity
-        data_size = len(secret_data.encode('utf-8'))
+        data_size = len(secret_data)
         if data_size > stats['capacity_bytes']:
             raise ValueError(
                 f"Data too large ({data_size} bytes). "
@@ -133,20 +229,19 @@ class StegoEngine:
             )
         
         # Prepare image
-        prepared_path = StegoEngine.prepare_image(cover_path)
+        if cover_image is None:
+            cover_image = StegoEngine.load_cover(cover_bytes)
         
         # Embed using LSB
-        stego_img = lsb.hide(prepared_path, secret_data)
-        stego_img.save(output_path, format='PNG', optimize=True)
-        
-        # Clean up temporary file
-        if prepared_path != cover_path and os.path.exists(prepared_path):
-            os.remove(prepared_path)
+        stego_img = StegoEngine._embed(cover_image, secret_data)
+        buffer = io.BytesIO()
+        stego_img.save(buffer, format='PNG', compress_level=StegoEngine.PNG_COMPRESS_LEVEL)
+        stego_bytes = buffer.getvalue()
         
         # Calculate stats
         result_stats = {
             'cover_size_kb': stats['size_kb'],
-            'stego_size_kb': os.path.getsize(output_path) / 1024,
+            'stego_size_kb': len(stego_bytes) / 1024,
             'payload_bytes': data_size,
             'payload_kb': data_size / 1024,
             'capacity_used_percent': (data_size / stats['capacity_bytes']) * 100,
@@ -154,21 +249,58 @@ class StegoEngine:
             'format': stats['format']
         }
         
+        return stego_bytes, result_stats
+    
+    @staticmethod
+    def hide(cover_path: str, secret_data: bytes, output_path: str, 
+             password: Optional[str] = None) -> Dict:
+        """
+        Hide encrypted data in image file using LSB
+        
+        Returns:
+            Statistics dictionary
+        """
+        if not os.path.exists(cover_path):
+            raise ValueError("Image file not found")
+        
+        stego_bytes, result_stats = StegoEngine.hide_bytes(
+            Path(cover_path).read_bytes(), secret_data
+        )
+        
+        with open(output_path, 'wb') as f:
+            f.write(stego_bytes)
+        
         return result_stats
     
     @staticmethod
-    def reveal(stego_path: str) -> str:
+    def hide_batch(cover_paths: Sequence[str], payloads: Sequence[bytes],
+                   output_paths: Sequence[str],
+                   max_workers: Optional[int] = None) -> List[Dict]:
         """
-        Extract hidden data from stego image
+        Hide one payload per cover image, several images at a time
+        
+        Decoding, the NumPy LSB pass and zlib all release the GIL, so
+        worker threads overlap on multi-core machines.
         
         Returns:
-            Extracted payload string
+            Statistics dictionaries, in input order
         """
-        if not os.path.exists(stego_path):
-            raise ValueError("Stego image not found")
+        if not len(cover_paths) == len(payloads) == len(output_paths):
+            raise ValueError("cover_paths, payloads and output_paths must have the same length")
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(StegoEngine.hide, cover_paths, payloads, output_paths))
+    
+    @staticmethod
+    def reveal_bytes(stego_bytes: bytes) -> bytes:
+        """
+        Extract hidden data from an in-memory stego image
         
+        Returns:
+            Extracted payload bytes
+        """
         try:
-            secret_data = lsb.reveal(stego_path)
+            secret_data = StegoEngine._extract(Image.open(io.BytesIO(stego_bytes)))
             
             if secret_data is None or len(secret_data) == 0:
                 raise ValueError("No hidden data detected in image")
@@ -178,6 +310,19 @@ class StegoEngine:
         except Exception as e:
             raise ValueError(f"Extraction failed: {str(e)}")
     
+    @staticmethod
+    def reveal(stego_path: str) -> bytes:
+        """
+        Extract hidden data from stego image file
+        
+        Returns:
+            Extracted payload bytes
+        """
+        if not os.path.exists(stego_path):
+            raise ValueError("Stego image not found")
+        
+        return StegoEngine.reveal_bytes(Path(stego_path).read_bytes())
+    
     @staticmethod
     def compare_images(original_path: str, stego_path: str) -> Dict:
         """
@@ -190,12 +335,19 @@ class StegoEngine:
         stego_img = Image.open(stego_path)
         
         # Calculate PSNR (Peak Signal-to-Noise Ratio)
-        import numpy as np
+        # Native dtype: forcing uint8 would wrap 16-bit and I;16 images
+        orig_array = np.asarray(orig_img)
+        stego_array = np.asarray(stego_img)
         
-        orig_array = np.array(orig_img)
-        stego_array = np.array(stego_img)
-        
-        mse = np.mean((orig_array.astype(float) - stego_array.astype(float)) ** 2)
+        if orig_array.dtype == np.uint8 and stego_array.dtype == np.uint8:
+            # One int16 difference; einsum squares and sums it into an int64
+            # accumulator without materializing float temporaries
+            diff = np.subtract(orig_array, stego_array, dtype=np.int16).ravel()
+            mse = float(np.einsum('i,i->', diff, diff, dtype=np.int64)) / diff.size
+        else:
+            # Wider or float modes: float64 cannot wrap
+            diff = np.subtract(orig_array, stego_array, dtype=np.float64).ravel()
+            mse = float(np.einsum('i,i->', diff, diff)) / diff.size
         
         if mse == 0:
             psnr = float('inf')